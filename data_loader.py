@@ -2,30 +2,96 @@
 """
 Chargement des données de prix et macro via yfinance et FRED.
 """
+import os
+import numpy as np
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
-from fredapi import Fred
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from diskcache import Cache
 import streamlit as st
 from constants import ETFS, MACRO_SERIES, TIMEFRAMES
 
+# Cache disque partagé entre sessions/redémarrages, à côté du module (et non du cwd)
+CACHE_DIR = os.environ.get(
+    'DCA_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dca_cache')
+)
+
+@st.cache_resource
+def get_disk_cache() -> Cache:
+    """Ouvre le cache disque une seule fois par processus, au premier besoin."""
+    return Cache(CACHE_DIR)
+
+def has_data(value) -> bool:
+    """Faux si le payload est vide ou si une colonne n'est que NaN (échec réseau, rate-limit)."""
+    if value is None or value.empty:
+        return False
+    all_nan = value.isna().all()
+    return not (all_nan.any() if isinstance(all_nan, pd.Series) else all_nan)
+
+def cached_daily(key: str, fetch):
+    """
+    Retourne la valeur du jour depuis le cache disque, sinon l'obtient via fetch().
+    `key` doit décrire toute la requête (fonction, période, tickers) ;
+    un payload sans données n'est pas conservé pour qu'un redémarrage réessaie.
+    Le cache n'est qu'une accélération : s'il est inutilisable (dossier en lecture
+    seule, disque plein, verrou sqlite...), on se contente d'appeler fetch().
+    """
+    key = f"{key}:{date.today().isoformat()}"
+    try:
+        cache = get_disk_cache()
+        if key in cache:
+            return cache[key]
+    except Exception:
+        return fetch()
+    value = fetch()
+    if has_data(value):
+        try:
+            cache.set(key, value, expire=86400)
+        except Exception:
+            pass
+    return value
+
+def clear_caches():
+    """Vide le cache Streamlit et le cache disque (bouton « Rafraîchir »)."""
+    st.cache_data.clear()
+    try:
+        get_disk_cache().clear()
+    except Exception:
+        pass  # cache disque absent ou inutilisable : rien à vider
+
 @st.cache_data
 def load_prices() -> pd.DataFrame:
-    """Télécharge les cours ajustés des ETFs sur la période nécessaire."""
+    """Télécharge en un seul appel les cours ajustés des ETFs sur la période nécessaire."""
+    # Import différé : yfinance n'est chargé qu'au premier téléchargement des cours
+    import yfinance as yf
     end = datetime.today()
     # On prend la plus longue fenêtre définie dans TIMEFRAMES
     max_window = max(TIMEFRAMES.values())
     # On récupère 1.1× cette durée (en jours)
     days = int(max_window * 1.1) 
     start = end - timedelta(days=days)
-    df = pd.DataFrame()
-    for name, ticker in ETFS.items():
+    # Un seul appel groupé : yfinance parallélise les tickers en interne
+    tickers = " ".join(ETFS.values())
+
+    def fetch():
         try:
-            data = yf.download(ticker, start=start, end=end, progress=False)
-            df[name] = data.get('Adj Close', data.get('Close'))
+            return yf.download(
+                tickers, start=start, end=end, auto_adjust=False,
+                group_by='ticker', threads=True, progress=False
+            )
         except Exception:
-            df[name] = pd.Series(dtype=float)
-    return df
+            return pd.DataFrame()
+
+    raw = cached_daily(f"data_loader.load_prices:{days}j:{tickers}", fetch)
+    # Index = union des calendriers de cotation ; chaque série garde ses propres dates
+    fetched = set(raw.columns.get_level_values(0))
+    df = pd.DataFrame({
+        name: (raw[ticker].get('Adj Close', raw[ticker].get('Close'))
+               if ticker in fetched else pd.Series(dtype=float))
+        for name, ticker in ETFS.items()
+    })
+    # float32 suffit pour des cours affichés à 2 décimales : cache deux fois plus léger
+    return df.astype(np.float32)
 
 @st.cache_data
 def load_macro() -> pd.DataFrame:
@@ -33,13 +99,26 @@ def load_macro() -> pd.DataFrame:
     api_key = st.secrets.get('FRED_API_KEY', None)
     if not api_key:
         return pd.DataFrame()
+    # Import différé : fredapi n'est chargé que si une clé FRED est configurée
+    from fredapi import Fred
     fred = Fred(api_key=api_key)
     end = datetime.today()
-    start = end - timedelta(days=365 * 6)
-    df = pd.DataFrame()
-    for label, code in MACRO_SERIES.items():
-        try:
-            df[label] = fred.get_series(code, start, end)
-        except Exception:
-            df[label] = pd.Series(dtype=float)
+    days = 365 * 6
+    start = end - timedelta(days=days)
+
+    def fetch(item):
+        label, code = item
+
+        def get_series():
+            try:
+                return fred.get_series(code, start, end)
+            except Exception:
+                return pd.Series(dtype=float)
+
+        return label, cached_daily(f"data_loader.load_macro:{days}j:{code}", get_series)
+
+    # Les séries sont téléchargées en parallèle (appels purement réseau)
+    with ThreadPoolExecutor(max_workers=len(MACRO_SERIES)) as executor:
+        results = dict(executor.map(fetch, MACRO_SERIES.items()))
+    df = pd.DataFrame(results)
     return df
@@ -5,12 +5,14 @@ utilisant un shift automatique pour sous-pondérer les scores négatifs,
 et affichant pour chaque indice sa carte complète (graphique, badges, allocation et points).
 """
 
+import os
 import streamlit as st
-import yfinance as yf
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-import plotly.express as px
-from fredapi import Fred
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from diskcache import Cache
+from pathlib import Path
 from typing import Tuple
 
 # --- CONFIGURATION DE LA PAGE ---
@@ -42,8 +44,53 @@ macro_series = {
 }
 
 # --- FONCTIONS UTILES ---
-def pct_change(s: pd.Series) -> float:
-    return float((s.iloc[-1] / s.iloc[-2] - 1) * 100) if len(s) > 1 else 0.0
+# Cache disque partagé entre sessions/redémarrages, ouvert une seule fois par processus,
+# à côté du script sauf si DCA_CACHE_DIR indique un autre dossier
+@st.cache_resource
+def get_disk_cache() -> Cache:
+    return Cache(os.environ.get('DCA_CACHE_DIR', str(Path(__file__).resolve().parent / '.dca_cache')))
+
+def has_data(value) -> bool:
+    if value is None or value.empty:
+        return False
+    all_nan = value.isna().all()
+    return not (all_nan.any() if isinstance(all_nan, pd.Series) else all_nan)
+
+# Valeur du jour : la clé décrit toute la requête, un payload vide (échec réseau) n'est pas conservé.
+# Le cache n'est qu'une accélération : s'il est inutilisable (lecture seule, disque plein...), on appelle fetch().
+def cached_daily(key: str, fetch):
+    key = f"{key}:{date.today().isoformat()}"
+    try:
+        cache = get_disk_cache()
+        if key in cache:
+            return cache[key]
+    except Exception:
+        return fetch()
+    value = fetch()
+    if has_data(value):
+        try:
+            cache.set(key, value, expire=86400)
+        except Exception:
+            pass
+    return value
+
+def clear_disk_cache():
+    try:
+        get_disk_cache().clear()
+    except Exception:
+        pass  # cache disque absent ou inutilisable : rien à vider
+
+# Matrice dense (n_jours, n_etfs) : cotations valides de chaque ETF empilées en bas (NaN au-dessus),
+# pour que series.dropna().tail(w) devienne arr[-w:, j] ; renvoie aussi le nb de cotations par ETF
+def align_last(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    values = df.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    rows = len(values) - counts + np.cumsum(valid, axis=0) - 1
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    arr = np.full(values.shape, np.nan)
+    arr[rows[valid], cols[valid]] = values[valid]
+    return arr, counts
 
 def score_and_style(diff: float, threshold_pct: float) -> Tuple[float, str, str]:
     t = threshold_pct / 100.0
@@ -60,63 +107,109 @@ def score_and_style(diff: float, threshold_pct: float) -> Tuple[float, str, str]
 st.sidebar.header("Paramètres de stratégie DCA")
 if st.sidebar.button("🔄 Rafraîchir"):
     st.cache_data.clear()
+    clear_disk_cache()
 threshold_pct = st.sidebar.slider("Seuil déviation (%)", 1, 20, 10, 1)
 debug = st.sidebar.checkbox("Afficher debug")
 
 # --- DONNÉES ---
 @st.cache_data
 def load_prices() -> pd.DataFrame:
+    # Import différé : yfinance n'est chargé qu'au premier téléchargement des cours
+    import yfinance as yf
     end = datetime.today()
     max_w = max(timeframes.values())
     trading_days = 252
     est_days = int(max_w / trading_days * 365 * 1.1)
     start = end - timedelta(days=est_days)
-    df = pd.DataFrame()
-    for name, ticker in etfs.items():
+    tickers = " ".join(etfs.values())
+
+    def fetch():
         try:
-            data = yf.download(ticker, start=start, end=end, progress=False)
-            df[name] = data.get('Adj Close', data.get('Close', pd.Series(dtype=float)))
+            return yf.download(
+                tickers, start=start, end=end, auto_adjust=False,
+                group_by='ticker', threads=True, progress=False
+            )
         except:
-            df[name] = pd.Series(dtype=float)
-    return df
+            return pd.DataFrame()
+
+    raw = cached_daily(f"dca_dashboard_streamlit.load_prices:{est_days}j:{tickers}", fetch)
+    # Index = union des calendriers de cotation ; chaque série garde ses propres dates
+    fetched = set(raw.columns.get_level_values(0))
+    df = pd.DataFrame({
+        name: (raw[ticker].get('Adj Close', raw[ticker].get('Close', pd.Series(dtype=float)))
+               if ticker in fetched else pd.Series(dtype=float))
+        for name, ticker in etfs.items()
+    })
+    # float32 suffit pour des cours affichés à 2 décimales : cache deux fois plus léger
+    return df.astype(np.float32)
 
 @st.cache_data
 def load_macro() -> pd.DataFrame:
     api_key = st.secrets.get('FRED_API_KEY', '')
     if not api_key:
         return pd.DataFrame()
+    # Import différé : fredapi n'est chargé que si une clé FRED est configurée
+    from fredapi import Fred
     fred = Fred(api_key=api_key)
     end = datetime.today()
-    start = end - timedelta(days=365*6)
-    df = pd.DataFrame()
-    for label, code in macro_series.items():
-        try:
-            df[label] = fred.get_series(code, start, end)
-        except:
-            df[label] = pd.Series(dtype=float)
+    days = 365*6
+    start = end - timedelta(days=days)
+
+    def fetch(item):
+        label, code = item
+
+        def get_series():
+            try:
+                return fred.get_series(code, start, end)
+            except:
+                return pd.Series(dtype=float)
+
+        return label, cached_daily(f"dca_dashboard_streamlit.load_macro:{days}j:{code}", get_series)
+
+    with ThreadPoolExecutor(max_workers=len(macro_series)) as executor:
+        results = dict(executor.map(fetch, macro_series.items()))
+    df = pd.DataFrame(results)
     return df
 
 # --- CALCUL SCORES BRUTS ---
-prices = load_prices()
-raw_scores = {}
-for name, series in prices.items():
-    s = series.dropna()
-    if len(s) < 1:
-        raw_scores[name] = 0.0
-        continue
-    last = s.iloc[-1]
-    score = sum(
-        score_and_style((last - s.tail(w).mean()) / s.tail(w).mean(), threshold_pct)[0]
-        for w in timeframes.values() if len(s) >= w
-    )
-    raw_scores[name] = score
+# Cours et dérivés mis en cache sur le seul seuil : un clic sur un badge ne relance rien
+@st.cache_data
+def load_and_score(threshold_pct: float):
+    prices = load_prices()
+    # Tout dérive d'une seule matrice dense ; les dicts ne servent qu'à l'affichage
+    names = list(prices.columns)
+    arr, counts = align_last(prices)
+
+    # Variation entre les deux dernières cotations de chaque ETF (0 si moins de 2)
+    pct = np.where(counts >= 2, (arr[-1] / arr[-2] - 1) * 100, 0.0) if len(arr) >= 2 else np.zeros(len(names))
+    deltas = dict(zip(names, pct.tolist()))
+
+    # Moyennes par fenêtre (points et badges) : une somme cumulée depuis la fin,
+    # somme des w dernières = rc[w-1]
+    rc = np.cumsum(arr[::-1], axis=0)
+    tf_means = {name: {} for name in names}
+    for lbl, w in timeframes.items():
+        if len(arr) >= w:
+            for j in np.flatnonzero(counts >= w):
+                tf_means[names[j]][lbl] = float(rc[w - 1, j] / w)
+
+    raw_scores = {}
+    for j, name in enumerate(names):
+        last = arr[-1, j] if counts[j] else np.nan
+        raw_scores[name] = float(sum(
+            score_and_style((last - m) / m, threshold_pct)[0]
+            for m in tf_means[name].values()
+        ))
+
+    # --- SHIFT & ALLOCATION DCA ---
+    min_score = min(raw_scores.values())
+    shift = -min_score if min_score < 0 else 0.0
+    adj_scores = {k: v + shift for k, v in raw_scores.items()}
+    sum_adj = sum(adj_scores.values()) or 1.0
+    allocations = {k: (v / sum_adj * 50) for k, v in adj_scores.items()}
+    return prices, deltas, tf_means, raw_scores, shift, adj_scores, allocations
 
-# --- SHIFT & ALLOCATION DCA ---
-min_score = min(raw_scores.values())
-shift = -min_score if min_score < 0 else 0.0
-adj_scores = {k: v + shift for k, v in raw_scores.items()}
-sum_adj = sum(adj_scores.values()) or 1.0
-allocations = {k: (v / sum_adj * 50) for k, v in adj_scores.items()}
+prices, deltas, tf_means, raw_scores, shift, adj_scores, allocations = load_and_score(threshold_pct)
 
 # --- SIDEBAR ALLOCATION ---
 st.sidebar.header("Allocation DCA (50% actions)")
@@ -127,11 +220,55 @@ for name, pct in allocations.items():
             f"raw={raw_scores[name]:+.2f}, shift={shift:.2f}, adj={adj_scores[name]:+.2f}"
         )
 
+# --- GRAPHIQUES & CARTES ---
+FIG_HEIGHT = 200  # hauteur (px) des graphiques
+# Hauteur (px) de la carte hors graphique : marges de l'iframe (16), bordure + padding (28),
+# titre (30), badges (28), points (18), allocation (22), macro sur 2 lignes (48)
+CARD_ROWS_HEIGHT = 190
+
+# Bloc HTML dans une iframe : st.iframe quand il existe, sinon components.html (anciennes versions)
+def html_frame(html: str, height: int):
+    if hasattr(st, "iframe"):
+        st.iframe(html, height=height)
+    else:
+        import streamlit.components.v1 as components
+        components.html(html, height=height)
+
+# Toute la carte en un seul bloc HTML : un seul message envoyé au navigateur au lieu d'un par élément
+def render_card(inner_html: str):
+    html_frame(
+        "<div style='border:2px solid #1f77b4; border-radius:6px; padding:12px; font-family:sans-serif;'>"
+        f"{inner_html}</div>",
+        height=FIG_HEIGHT + CARD_ROWS_HEIGHT
+    )
+
+# Mis en cache sur (ETF, période, dernière cotation) : seules les cartes modifiées sont reconstruites.
+# HTML avec plotly.js depuis le CDN : le navigateur le charge une fois au lieu d'une copie par graphique.
+@st.cache_data
+def build_fig_html(name: str, period: int, last_ts: int, _data: pd.Series) -> str:
+    # Import différé : plotly n'est chargé qu'au premier graphique
+    import plotly.express as px
+    fig = px.line(_data.tail(period), height=FIG_HEIGHT)
+    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), showlegend=False)
+    return fig.to_html(include_plotlyjs='cdn', full_html=False)
+
 # --- AFFICHAGE PRINCIPAL ---
 st.title("Dashboard DCA ETF")
 cols = st.columns(2)
 macro_df = load_macro()
-deltas = {n: pct_change(prices[n].dropna()) for n in prices}
+# Macro indicateurs : identiques pour toutes les cartes, calculés une fois
+items = []
+for lbl in macro_series:
+    s = macro_df[lbl].dropna() if lbl in macro_df else None
+    if s is not None and not s.empty:
+        items.append(f"<li>{lbl}: {s.iloc[-1]:.2f}</li>")
+    else:
+        items.append(f"<li>{lbl}: N/A</li>")
+half = len(items)//2 + len(items)%2
+macro_html = (
+    "<div style='display:flex;gap:20px;'><ul style='margin:0;padding-left:16px'>"
+    f"{''.join(items[:half])}</ul><ul style='margin:0;padding-left:16px'>{''.join(items[half:])}</ul></div>"
+)
 
 for idx, (name, series) in enumerate(prices.items()):
     data = series.dropna()
@@ -141,77 +278,53 @@ for idx, (name, series) in enumerate(prices.items()):
     delta = deltas.get(name, 0.0)
     perf_color = 'green' if delta >= 0 else 'crimson'
 
-    # Calcul des poids par timeframe
-    weights = {}
-    for lbl, w in timeframes.items():
-        if len(data) >= w:
-            m = data.tail(w).mean()
+    # Poids et badges par timeframe
+    weights, badges = {}, []
+    for lbl in timeframes:
+        if lbl in tf_means[name]:
+            m = tf_means[name][lbl]
             diff = (last - m) / m
-            wt, _, _ = score_and_style(diff, threshold_pct)
-            weights[lbl] = wt
+            weights[lbl], arrow, bg = score_and_style(diff, threshold_pct)
+            tooltip = f"Moyenne {lbl}: {m:.2f}"
         else:
             weights[lbl] = None
+            arrow, bg, tooltip = '↓','crimson','N/A'
+        badges.append((lbl, arrow, bg, tooltip))
+
+    # Période du graphique via session_state
+    key = f"win_{name}"
+    if key not in st.session_state:
+        st.session_state[key] = 'Annuel'
+    period = timeframes[st.session_state[key]]
+
+    # Points de pondération & allocation DCA
+    pts = ", ".join(
+        f"{lbl}:{weights[lbl]:+0.1f}" for lbl in timeframes if weights[lbl] is not None
+    )
+    alloc = allocations.get(name, 0)
+
+    # Carte ETF : titre, graphique, badges, points, allocation et macro en un seul bloc
+    card_html = (
+        f"<h4 style='margin:0 0 8px;'>{name}: {last:.2f} <span style='color:{perf_color}'>{delta:+.2f}%</span></h4>"
+        + build_fig_html(name, period, data.index[-1].value, data)
+        + "<div>" + "".join(
+            f"<span title='{tooltip}' style='background:{bg};color:white;padding:4px;border-radius:4px;font-size:12px;margin-right:4px;'>{lbl} {arrow}</span>"
+            for lbl, arrow, bg, tooltip in badges
+        ) + "</div>"
+        + f"<div style='font-size:12px;'>Points: {pts}</div>"
+        + f"<div style='text-align:right;color:#ff7f0e;'>Allocation DCA: {alloc:.1f}%</div>"
+        + macro_html
+    )
 
-    # Carte ETF
     with cols[idx % 2]:
-        st.markdown(
-            f"<div style='border:2px solid #1f77b4; border-radius:6px; padding:12px; margin:6px;'>", unsafe_allow_html=True
-        )
-        st.markdown(
-            f"<h4>{name}: {last:.2f} <span style='color:{perf_color}'>{delta:+.2f}%</span></h4>", unsafe_allow_html=True
-        )
-        # Graphique
-        key = f"win_{name}"
-        if key not in st.session_state:
-            st.session_state[key] = 'Annuel'
-        period = timeframes[st.session_state[key]]
-        df_plot = data.tail(period)
-        fig = px.line(df_plot, height=200)
-        fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Badges
+        render_card(card_html)
+
+        # Boutons de période (widgets Streamlit, donc hors du bloc HTML)
         badge_cols = st.columns(len(timeframes))
-        for i, (lbl, w) in enumerate(timeframes.items()):
-            if len(data) >= w:
-                m = data.tail(w).mean()
-                diff = (last - m) / m
-                _, arrow, bg = score_and_style(diff, threshold_pct)
-                tooltip = f"Moyenne {lbl}: {m:.2f}"
-            else:
-                arrow, bg, tooltip = '↓','crimson','N/A'
+        for i, (lbl, arrow, _, _) in enumerate(badges):
             with badge_cols[i]:
                 if st.button(f"{lbl} {arrow}", key=f"{name}_{lbl}"):
                     st.session_state[key] = lbl
-                st.markdown(
-                    f"<span title='{tooltip}' style='background:{bg};color:white;padding:4px;border-radius:4px;font-size:12px;'>{lbl} {arrow}</span>", unsafe_allow_html=True
-                )
-
-        # Points de pondération
-        pts = ", ".join(
-            f"{lbl}:{weights[lbl]:+0.1f}" for lbl in timeframes if weights[lbl] is not None
-        )
-        st.markdown(f"<div style='font-size:12px;'>Points: {pts}</div>", unsafe_allow_html=True)
-        # Allocation DCA
-        alloc = allocations.get(name, 0)
-        st.markdown(
-            f"<div style='text-align:right;color:#ff7f0e;'>Allocation DCA: {alloc:.1f}%</div>", unsafe_allow_html=True
-        )
-
-        # Macro indicateurs
-        items = []
-        for lbl in macro_series:
-            if lbl in macro_df and not macro_df[lbl].dropna().empty:
-                val = macro_df[lbl].dropna().iloc[-1]
-                items.append(f"<li>{lbl}: {val:.2f}</li>")
-            else:
-                items.append(f"<li>{lbl}: N/A</li>")
-        half = len(items)//2 + len(items)%2
-        st.markdown(
-            "<div style='display:flex;gap:20px;'><ul style='margin:0;padding-left:16px'>"
-            f"{''.join(items[:half])}</ul><ul style='margin:0;padding-left:16px'>{''.join(items[half:])}</ul></div>", unsafe_allow_html=True
-        )
-        st.markdown("</div>", unsafe_allow_html=True)
 
 # Clé FRED
 if macro_df.empty:
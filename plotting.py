@@ -2,12 +2,29 @@
 """
 Wrapper pour la génération de figures Plotly.
 """
-import plotly.express as px
 import pandas as pd
+import streamlit as st
+from typing import TYPE_CHECKING
 
-def make_timeseries_fig(series: pd.Series, period_days: int) -> px.line:
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+FIG_HEIGHT = 200  # hauteur (px) des graphiques de cartes
+
+def make_timeseries_fig(series: pd.Series, period_days: int) -> "go.Figure":
     """Retourne un graphique linéaire Plotly pour les days derniers."""
+    # Import différé : plotly n'est chargé qu'au premier graphique
+    import plotly.express as px
     df = series.tail(period_days)
-    fig = px.line(df, height=200)
+    fig = px.line(df, height=FIG_HEIGHT)
     fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), showlegend=False)
     return fig
+
+@st.cache_data
+def cached_timeseries_html(name: str, period_days: int, last_ts: int, _series: pd.Series) -> str:
+    """
+    Fragment HTML de make_timeseries_fig, mis en cache sur (ETF, période, dernière cotation).
+    plotly.js est chargé depuis le CDN (mis en cache par le navigateur) au lieu d'être embarqué.
+    """
+    fig = make_timeseries_fig(_series, period_days)
+    return fig.to_html(include_plotlyjs="cdn", full_html=False)
@@ -2,8 +2,9 @@
 """
 Fonctions de calcul de performance relative et mapping en score/affichage.
 """
+import numpy as np
 import pandas as pd
-from typing import Tuple
+from typing import Dict, Tuple
 
 def pct_change(s: pd.Series) -> float:
     """% de variation entre les deux dernières valeurs."""
@@ -27,3 +28,52 @@ def score_and_style(diff: float, threshold_pct: float) -> Tuple[float, str, str]
         return -0.5,'↘','orange'
     else:
         return -1.0,'↓','crimson'
+
+def score_values(diffs: np.ndarray, threshold_pct: float) -> np.ndarray:
+    """Version vectorisée du score de score_and_style ; 0 pour les écarts NaN."""
+    t = threshold_pct / 100.0
+    scores = np.select([diffs <= -t, diffs <= 0, diffs < t], [1.0, 0.5, -0.5], default=-1.0)
+    return np.where(np.isnan(diffs), 0.0, scores)
+
+def align_last(prices: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Empile les cotations valides de chaque colonne en bas d'une matrice
+    (NaN au-dessus), pour que `series.dropna().tail(w)` devienne `arr[-w:, j]`.
+    Retourne la matrice et le nombre de cotations valides par colonne.
+    """
+    values = prices.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    rows = len(values) - counts + np.cumsum(valid, axis=0) - 1
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    arr = np.full(values.shape, np.nan)
+    arr[rows[valid], cols[valid]] = values[valid]
+    return arr, counts
+
+def window_means(arr: np.ndarray, counts: np.ndarray, windows: Dict[str, int]) -> np.ndarray:
+    """
+    Moyenne des w dernières cotations de chaque colonne de `arr` (cf. align_last),
+    une ligne par fenêtre. Une seule somme cumulée depuis la fin sert toutes
+    les fenêtres ; NaN si l'historique est trop court.
+    """
+    rc = np.cumsum(arr[::-1], axis=0)
+    means = np.full((len(windows), arr.shape[1]), np.nan)
+    for i, w in enumerate(windows.values()):
+        if len(arr) >= w:
+            means[i] = np.where(counts >= w, rc[w - 1] / w, np.nan)
+    return means
+
+def compute_raw_scores(arr: np.ndarray, means: np.ndarray, threshold_pct: float) -> np.ndarray:
+    """
+    Score brut par colonne : somme des scores sur les fenêtres disponibles.
+    `means` est le résultat de window_means(arr, ...).
+    """
+    last = arr[-1] if len(arr) else np.full(arr.shape[1], np.nan)
+    diffs = (last - means) / means
+    return score_values(diffs, threshold_pct).sum(axis=0)
+
+def pct_changes(arr: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Version matricielle de pct_change, par colonne de `arr` (cf. align_last)."""
+    if len(arr) < 2:
+        return np.zeros(arr.shape[1])
+    return np.where(counts >= 2, (arr[-1] / arr[-2] - 1) * 100, 0.0)
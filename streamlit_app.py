@@ -5,10 +5,11 @@ Dashboard DCA ETF avec cartes « full-block » encadrées.
 
 import streamlit as st
 from constants       import ETFS, TIMEFRAMES, MACRO_SERIES
-from data_loader     import load_prices, load_macro
-from scoring         import pct_change, score_and_style
-from plotting        import make_timeseries_fig
-from streamlit_utils import inject_css, begin_card, end_card
+from data_loader     import load_prices, load_macro, clear_caches
+from scoring         import (score_and_style, align_last, window_means,
+                             compute_raw_scores, pct_changes)
+from plotting        import cached_timeseries_html, FIG_HEIGHT
+from streamlit_utils import inject_css, render_card
 
 # --- CONFIGURATION DE LA PAGE ---
 st.set_page_config(
@@ -21,33 +22,37 @@ inject_css()
 # --- SIDEBAR DE RÉGLAGES ---
 st.sidebar.header("Paramètres de rééquilibrage")
 if st.sidebar.button("🔄 Rafraîchir"):
-    st.cache_data.clear()
+    clear_caches()
 threshold_pct = st.sidebar.slider("Seuil déviation (%)", 5, 30, 15, 5)
 st.sidebar.write("VIX non disponible")  # exemple de ligne libre
 
-# --- CHARGEMENT DES DONNÉES ---
-prices   = load_prices()
+# --- CHARGEMENT DES DONNÉES, SCORES & ALLOCATIONS ---
+@st.cache_data
+def load_and_score(threshold_pct: float):
+    """
+    Cours, moyennes par fenêtre, variations, scores bruts et allocations,
+    mis en cache sur le seul seuil : un clic sur un badge ne relance rien,
+    le bouton « Rafraîchir » vide ce cache avec celui des cours.
+    """
+    prices = load_prices()
+    # Tout dérive d'une seule matrice dense ; les dicts ne servent qu'à l'affichage
+    names       = list(prices.columns)
+    arr, counts = align_last(prices)
+    means       = window_means(arr, counts, TIMEFRAMES)
+    raw_scores  = dict(zip(names, compute_raw_scores(arr, means, threshold_pct).tolist()))
+    deltas      = dict(zip(names, pct_changes(arr, counts).tolist()))
+    tf_means    = {n: dict(zip(TIMEFRAMES, means[:, j].tolist())) for j, n in enumerate(names)}
+
+    min_score   = min(raw_scores.values(), default=0.0)
+    shift       = -min_score if min_score < 0 else 0.0
+    adj_scores  = {k: v + shift for k, v in raw_scores.items()}
+    total       = sum(adj_scores.values()) or 1.0
+    allocations = {k: v / total * 100 for k, v in adj_scores.items()}  # en % sur 100%
+    return prices, tf_means, deltas, raw_scores, allocations
+
+prices, tf_means, deltas, raw_scores, allocations = load_and_score(threshold_pct)
 macro_df = load_macro()
 
-# --- CALCUL DES SCORES & ALLOCATIONS ---
-raw_scores = {}
-for name, series in prices.items():
-    s = series.dropna()
-    if len(s) < 1:
-        raw_scores[name] = 0.0
-    else:
-        last = s.iloc[-1]
-        raw_scores[name] = sum(
-            score_and_style((last - s.tail(w).mean()) / s.tail(w).mean(), threshold_pct)[0]
-            for w in TIMEFRAMES.values() if len(s) >= w
-        )
-
-min_score   = min(raw_scores.values(), default=0.0)
-shift       = -min_score if min_score < 0 else 0.0
-adj_scores  = {k: v + shift for k, v in raw_scores.items()}
-total       = sum(adj_scores.values()) or 1.0
-allocations = {k: v / total * 100 for k, v in adj_scores.items()}  # en % sur 100%
-
 # --- AFFICHAGE SIDEBAR ALLOCATIONS ---
 st.sidebar.header("Allocation dynamique (%)")
 for name, pct in allocations.items():
@@ -60,7 +65,16 @@ for name, pct in allocations.items():
 st.title("Dashboard DCA ETF")
 
 cols   = st.columns(2)
-deltas = {n: pct_change(prices[n].dropna()) for n in prices}
+
+# Macro-indicateurs : identiques pour toutes les cartes, calculés une fois
+items = []
+for lbl in MACRO_SERIES:
+    s = macro_df[lbl].dropna() if lbl in macro_df else None
+    if s is not None and not s.empty:
+        items.append(f"<li>{lbl}: {s.iloc[-1]:.2f}</li>")
+    else:
+        items.append(f"<li>{lbl}: N/A</li>")
+macro_html = "<ul style='columns:2;margin-top:8px;'>" + "".join(items) + "</ul>"
 
 for idx, (name, series) in enumerate(prices.items()):
     data = series.dropna()
@@ -79,59 +93,44 @@ for idx, (name, series) in enumerate(prices.items()):
     period_lbl = st.session_state[key_win]
     period     = TIMEFRAMES[period_lbl]
 
-    # Graphique Plotly
-    fig = make_timeseries_fig(data, period)
+    # Graphique Plotly (les cartes inchangées sont servies depuis le cache)
+    fig_html = cached_timeseries_html(name, period, data.index[-1].value, data)
 
     # Allocation & couleur de bordure (on met en rouge ici pour reproduire votre screenshot)
     alloc_pct   = allocations[name]
     border_color = "crimson"  # ou calculez via get_border_color(alloc_pct)
 
-    # --- CARTE COMPLÈTE ---
-    with cols[idx % 2]:
-        begin_card(border_color)
+    # Badges : flèche & couleur par fenêtre
+    badges = []
+    for lbl, w in TIMEFRAMES.items():
+        if len(data) >= w:
+            m    = tf_means[name][lbl]
+            diff = (last - m) / m
+            _, arrow, bg = score_and_style(diff, threshold_pct)
+        else:
+            arrow, bg = "↓", "crimson"
+        badges.append((lbl, arrow, bg))
+
+    # --- CARTE COMPLÈTE : un seul bloc HTML envoyé au navigateur ---
+    card_html = (
+        f"<b>{name}: {last:.2f} "
+        f"<span style='color:{perf_color}'>{delta:+.2f}%</span></b>"
+        + fig_html
+        + "<div>" + "".join(
+            f"<span style='background:{bg};color:white;"
+            f"padding:4px;border-radius:4px;font-size:12px;margin-right:4px;'>"
+            f"{lbl} {arrow}</span>"
+            for lbl, arrow, bg in badges
+        ) + "</div>"
+        + macro_html
+    )
 
-        # Titre + variation %
-        st.markdown(
-            f"**{name}: {last:.2f} "
-            f"<span style='color:{perf_color}'>{delta:+.2f}%</span>**",
-            unsafe_allow_html=True
-        )
-
-        # Chart
-        st.plotly_chart(fig, use_container_width=True)
+    with cols[idx % 2]:
+        render_card(card_html, FIG_HEIGHT, border_color)
 
-        # Badges interactifs
+        # Boutons de période (widgets Streamlit, donc hors du bloc HTML)
         badge_cols = st.columns(len(TIMEFRAMES))
-        for i, (lbl, w) in enumerate(TIMEFRAMES.items()):
+        for i, (lbl, arrow, _) in enumerate(badges):
             with badge_cols[i]:
-                if len(data) >= w:
-                    m    = data.tail(w).mean()
-                    diff = (last - m) / m
-                    score, arrow, bg = score_and_style(diff, threshold_pct)
-                else:
-                    score, arrow, bg = 0, "↓", "crimson"
-
                 if st.button(f"{lbl} {arrow}", key=f"{name}_{lbl}"):
                     st.session_state[key_win] = lbl
-
-                st.markdown(
-                    f"<span style='background:{bg};color:white;"
-                    f"padding:4px;border-radius:4px;font-size:12px;'>"
-                    f"{lbl} {arrow}</span>",
-                    unsafe_allow_html=True
-                )
-
-        # Macro-indicateurs
-        items = []
-        for lbl in MACRO_SERIES:
-            if lbl in macro_df and not macro_df[lbl].dropna().empty:
-                val = macro_df[lbl].dropna().iloc[-1]
-                items.append(f"<li>{lbl}: {val:.2f}</li>")
-            else:
-                items.append(f"<li>{lbl}: N/A</li>")
-        st.markdown(
-            "<ul style='columns:2;margin-top:8px;'>" + "".join(items) + "</ul>",
-            unsafe_allow_html=True
-        )
-
-        end_card()
@@ -11,21 +11,33 @@ def inject_css():
     """
     pass
 
-def begin_card(border_color: str = "crimson"):
+def html_frame(html: str, height: int):
     """
-    Ouvre un <div> avec une bordure de 3px et un border-radius de 6px,
-    de la couleur passée en paramètre.
-    Tout le contenu suivant sera à l’intérieur de cette carte jusqu’à end_card().
+    Affiche un bloc HTML dans une iframe de hauteur fixe : st.iframe quand il existe,
+    sinon components.html (seul disponible sur les anciennes versions, déprécié depuis).
     """
-    st.markdown(
+    if hasattr(st, "iframe"):
+        st.iframe(html, height=height)
+    else:
+        import streamlit.components.v1 as components
+        components.html(html, height=height)
+
+# Hauteur (px) de la carte hors graphique : marges de l'iframe (16), bordure + padding (30),
+# titre (24), badges (28), liste macro sur 2 lignes avec ses marges (72)
+CARD_ROWS_HEIGHT = 170
+
+def render_card(inner_html: str, fig_height: int, border_color: str = "crimson"):
+    """
+    Affiche une carte complète (bordure + contenu HTML) en un seul composant,
+    soit un seul message envoyé au navigateur au lieu d'un par élément.
+    L'iframe ne défile pas : sa hauteur est celle du graphique plus les lignes fixes.
+    """
+    html_frame(
         f"<div style='"
         f"border:3px solid {border_color};"
         f"border-radius:6px;"
         f"padding:12px;"
-        f"margin:12px 0;'>",
-        unsafe_allow_html=True
+        f"font-family:sans-serif;'>"
+        f"{inner_html}</div>",
+        height=fig_height + CARD_ROWS_HEIGHT
     )
-
-def end_card():
-    """Ferme la <div> de la carte."""
-    st.markdown("</div>", unsafe_allow_html=True)
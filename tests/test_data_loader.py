@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 import pytest
 import pandas as pd
-from dca_dashboard.data_loader import load_prices, load_macro
+import data_loader
+from data_loader import load_prices, load_macro, cached_daily
 
 def test_load_prices_structure():
     df = load_prices()
     assert isinstance(df, pd.DataFrame)
-    from dca_dashboard.constants import ETFS
+    from constants import ETFS
     for name in ETFS:
         assert name in df.columns
 
@@ -15,3 +17,77 @@ def test_load_macro_empty_when_no_key(monkeypatch):
     monkeypatch.setattr(st, 'secrets', {})
     df = load_macro()
     assert df.empty
+
+class FakeCache(dict):
+    def set(self, key, value, expire=None):
+        self[key] = value
+
+def test_cached_daily_skips_empty_payloads(monkeypatch):
+    cache = FakeCache()
+    monkeypatch.setattr(data_loader, 'get_disk_cache', lambda: cache)
+    cached_daily('vide', lambda: pd.Series(dtype=float))
+    cached_daily('nan', lambda: pd.DataFrame({'SPY': [np.nan, np.nan]}))
+    assert not cache
+    cached_daily('ok', lambda: pd.Series([1.0, 2.0]))
+    assert len(cache) == 1
+
+def fake_download(frames):
+    """Frame au format yf.download(..., group_by='ticker') : colonnes (ticker, champ)."""
+    def download(tickers, **kwargs):
+        return pd.concat(frames, axis=1)
+    return download
+
+def test_load_prices_pivots_grouped_download(monkeypatch):
+    import yfinance
+    from constants import ETFS
+    idx = pd.date_range('2024-01-01', periods=3)
+    frames = {
+        ticker: pd.DataFrame({'Adj Close': [1.0, 2.0, 3.0], 'Close': [9.0, 9.0, 9.0]}, index=idx)
+        for ticker in ETFS.values() if ticker not in ('^FCHI', 'EEM')
+    }
+    frames['^FCHI'] = pd.DataFrame({'Close': [4.0, 5.0, 6.0]}, index=idx)  # pas d'Adj Close
+    monkeypatch.setattr(yfinance, 'download', fake_download(frames))
+    monkeypatch.setattr(data_loader, 'cached_daily', lambda key, fetch: fetch())
+    load_prices.clear()
+    df = load_prices()
+    assert list(df.columns) == list(ETFS)
+    assert df['S&P500'].tolist() == [1.0, 2.0, 3.0]
+    assert df['CAC40'].tolist() == [4.0, 5.0, 6.0]
+    assert df['EMERGING'].isna().all()  # ticker absent du téléchargement
+    assert (df.dtypes == np.float32).all()
+
+def test_load_prices_empty_when_download_fails(monkeypatch):
+    import yfinance
+    from constants import ETFS
+
+    def failing_download(tickers, **kwargs):
+        raise ConnectionError("rate limited")
+
+    monkeypatch.setattr(yfinance, 'download', failing_download)
+    monkeypatch.setattr(data_loader, 'cached_daily', lambda key, fetch: fetch())
+    load_prices.clear()
+    df = load_prices()
+    assert list(df.columns) == list(ETFS)
+    assert df.empty
+
+def test_load_prices_downloads_when_disk_cache_broken(monkeypatch):
+    import yfinance
+    from constants import ETFS
+    idx = pd.date_range('2024-01-01', periods=2)
+    frames = {t: pd.DataFrame({'Close': [1.0, 2.0]}, index=idx) for t in ETFS.values()}
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(tickers)
+        return pd.concat(frames, axis=1)
+
+    def broken_cache():
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(yfinance, 'download', download)
+    monkeypatch.setattr(data_loader, 'get_disk_cache', broken_cache)
+    load_prices.clear()
+    df = load_prices()
+    assert len(calls) == 1
+    assert df.shape == (2, len(ETFS))
+    data_loader.clear_caches()  # ne doit pas lever
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 import pandas as pd
-from dca_dashboard.scoring import pct_change, score_and_style
+from scoring import (
+    pct_change, score_and_style, score_values,
+    align_last, window_means, compute_raw_scores, pct_changes
+)
 
 def test_pct_change_empty():
     assert pct_change(pd.Series(dtype=float)) == 0.0
@@ -18,3 +22,38 @@ def test_score_and_style():
     assert s3[0] == -0.5
     s4 = score_and_style(0.2, 10)
     assert s4[0] == -1.0
+
+def test_score_values_matches_score_and_style():
+    diffs = np.array([-0.2, -0.05, 0.0, 0.05, 0.2, np.nan])
+    expected = [score_and_style(d, 10)[0] for d in diffs[:-1]] + [0.0]
+    assert score_values(diffs, 10).tolist() == expected
+
+def test_window_means_matches_dropna_tail():
+    prices = pd.DataFrame({
+        'A': [1.0, 2.0, 3.0, 4.0],
+        'B': [np.nan, 10.0, np.nan, 20.0],
+    })
+    arr, counts = align_last(prices)
+    assert counts.tolist() == [4, 2]
+    means = window_means(arr, counts, {'court': 2, 'long': 3})
+    assert means[:, 0].tolist() == [3.5, 3.0]
+    assert means[0, 1] == 15.0
+    assert np.isnan(means[1, 1])
+
+def test_pct_changes_matches_pct_change():
+    prices = pd.DataFrame({
+        'A': [100.0, np.nan, 110.0],
+        'B': [np.nan, np.nan, 50.0],
+    })
+    arr, counts = align_last(prices)
+    expected = [pct_change(prices[c].dropna()) for c in prices]
+    assert np.allclose(pct_changes(arr, counts), expected)
+
+def test_compute_raw_scores():
+    prices = pd.DataFrame({
+        'bas': [10.0, 10.0, 10.0, 5.0],
+        'haut': [10.0, 10.0, 10.0, 20.0],
+    })
+    arr, counts = align_last(prices)
+    means = window_means(arr, counts, {'court': 2, 'trop long': 10})
+    assert compute_raw_scores(arr, means, 10).tolist() == [1.0, -1.0]